@@ -1,10 +1,16 @@
 import streamlit as st
 import json
+import orjson
 import os
-from datetime import datetime
-from PIL import Image
+from datetime import date, datetime
+from decimal import Decimal
+from PIL import Image, ImageChops
 import io
-from pdf2image import convert_from_bytes
+import re
+import functools
+import hashlib
+import numpy as np
+import pandas as pd
 from transaction_extractor import TransactionExtractor
 from tally_xml_generator import TallyXMLGenerator
 from gst_processor import GSTProcessor
@@ -23,44 +29,192 @@ st.set_page_config(
     layout="wide"
 )
 
-def convert_file_to_png_bytes(uploaded_file) -> bytes:
+# Rasterization settings for uploaded documents. Bank statements use a lower
+# DPI: their text stays legible for extraction at roughly half the pixels of
+# 200 DPI, while invoices keep the default for small line-item print.
+DEFAULT_RASTER_DPI = 200
+BANK_STATEMENT_DPI = 144
+
+# All statement pages go to Gemini inline in one request, which is limited to
+# 20 MB after base64 encoding (a 4/3 expansion). The page images are budgeted
+# at 14 MB, and the page cap is sized so a full statement of colour pages at
+# BANK_STATEMENT_DPI (about 1 MB each as fast PNG) fits in that budget.
+MAX_EXTRACTION_PAYLOAD_BYTES = 14 * 1024 * 1024
+MAX_BANK_STATEMENT_PAGES = 12
+
+# Converted uploads cached per file: a full statement (at most one file per
+# page) plus headroom for invoices, so a statement never evicts its own files
+# between reruns
+CONVERTED_FILE_CACHE_SIZE = MAX_BANK_STATEMENT_PAGES + 8
+MAX_IMAGE_SIZE = (1800, 1800)
+
+# Known schema of the transactions returned by TransactionExtractor
+BANK_TRANSACTION_COLUMNS = ['date', 'narration', 'debit_amount', 'credit_amount', 'running_balance']
+BANK_AMOUNT_COLUMNS = ['debit_amount', 'credit_amount', 'running_balance']
+
+# Widget option lists, built once at import instead of on every rerun
+INDIAN_STATES = (
+    "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh", "Goa", "Gujarat", "Haryana",
+    "Himachal Pradesh", "Jharkhand", "Karnataka", "Kerala", "Madhya Pradesh", "Maharashtra", "Manipur",
+    "Meghalaya", "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan", "Sikkim", "Tamil Nadu",
+    "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal", "Delhi", "Puducherry"
+)
+INVOICE_TYPES = ("Purchase Invoice", "Sales Invoice")
+GST_RETURN_TYPES = ("GSTR1 (Sales)", "GSTR2A (Purchase)", "GSTR2B (Purchase)", "GSTR3B (Monthly Return)")
+GST_TAB_LABELS = (
+    "📥 Upload GST JSON to Tally", 
+    "📤 Create GSTR1 from Sales Invoices", 
+    "🏛️ GSTR2B Dedicated Processor",
+    "🔄 Bulk Process GST Data"
+)
+PLACE_OF_SUPPLY_OPTIONS = (
+    "01-Jammu and Kashmir", "02-Himachal Pradesh", "03-Punjab", "04-Chandigarh",
+    "05-Uttarakhand", "06-Haryana", "07-Delhi", "08-Rajasthan", "09-Uttar Pradesh",
+    "10-Bihar", "11-Sikkim", "12-Arunachal Pradesh", "13-Nagaland", "14-Manipur",
+    "15-Mizoram", "16-Tripura", "17-Meghalaya", "18-Assam", "19-West Bengal",
+    "20-Jharkhand", "21-Odisha", "22-Chhattisgarh", "23-Madhya Pradesh",
+    "24-Gujarat", "25-Daman and Diu", "26-Dadra and Nagar Haveli", "27-Maharashtra",
+    "28-Andhra Pradesh", "29-Karnataka", "30-Goa", "31-Lakshadweep", "32-Kerala",
+    "33-Tamil Nadu", "34-Puducherry", "35-Andaman and Nicobar Islands", "36-Telangana",
+    "37-Andhra Pradesh"
+)
+GST_TAX_RATES = (0, 5, 12, 18, 28)
+
+# State name -> GST state code; the mapping does not depend on the company state
+GST_STATE_CODES = GSTProcessor("Delhi").state_codes
+
+# Columns expected in the bulk GSTR1 invoice CSV
+BULK_GSTR1_COLUMNS = ('customer_gstin', 'invoice_number', 'invoice_date', 'place_of_supply', 'tax_rate', 'taxable_value')
+
+# Place-of-supply state codes accepted on GSTR1 invoices
+GST_POS_CODES = frozenset(f"{code:02d}" for code in range(1, 38))
+
+# GSTIN layout: state code, PAN, entity number, 'Z', checksum character
+GSTIN_PATTERN = re.compile(r"^\d{2}[A-Z]{5}\d{4}[A-Z][1-9A-Z]Z[\dA-Z]$")
+
+# Largest per-pixel channel difference still treated as grayscale
+GRAYSCALE_TOLERANCE = 8
+
+# Single-invoice GSTR1 document; only the invoice-specific slots vary. This is
+# the same document build_gstr1_bulk returns as a dict, so a change to the
+# GSTR1 schema must be made in both places.
+_GSTR1_TEMPLATE = (
+    '{{"version":"GST1.1","hash":"auto_generated_hash","gstin":"{gstin}","fp":"{fp}",'
+    '"b2b":[{{"ctin":{ctin},"inv":[{{"inum":{inum},"idt":"{idt}","val":{val:.2f},"pos":"{pos}",'
+    '"rchrg":"N","etin":"","inv_typ":"R","itms":[{{"num":1,"itm_det":{{"rt":{rt},'
+    '"txval":{txval:.2f},"iamt":{iamt:.2f},"camt":{camt:.2f},"samt":{samt:.2f},"csamt":0}}}}]}}]}}],'
+    '"b2cs":[],"hsn":[],"doc_issue":{{}}}}'
+)
+
+@functools.lru_cache(maxsize=1)
+def _pdf_lib():
+    """Import PyMuPDF on first use so sessions without PDF uploads skip its import cost."""
+    import fitz
+    return fitz
+
+def convert_file_to_png_bytes(uploaded_file, dpi: int = DEFAULT_RASTER_DPI) -> bytes:
     """
     Convert uploaded file (PNG, JPG, JPEG, PDF) to PNG bytes.
     
+    Only the first page of a PDF is converted.
+    
     Args:
         uploaded_file: Streamlit UploadedFile object
+        dpi: Resolution used when rasterizing PDF pages
         
     Returns:
         PNG image bytes
     """
-    file_bytes = uploaded_file.read()
+    return convert_file_to_png_pages(uploaded_file, dpi, max_pages=1)[0]
+
+def convert_file_to_png_pages(uploaded_file, dpi: int = DEFAULT_RASTER_DPI, max_pages: int = 1) -> list:
+    """
+    Convert uploaded file (PNG, JPG, JPEG, PDF) to PNG bytes for each page.
+    
+    Args:
+        uploaded_file: Streamlit UploadedFile object
+        dpi: Resolution used when rasterizing PDF pages
+        max_pages: Most PDF pages to convert, starting from the first
+        
+    Returns:
+        List of PNG image bytes, in page order
+    """
+    file_bytes = uploaded_file.getvalue()
     file_extension = uploaded_file.name.lower().split('.')[-1]
+    return _convert_bytes_to_png_pages(content_fingerprint(file_bytes), file_bytes, file_extension, dpi, max_pages)
+
+def content_fingerprint(*blobs: bytes) -> str:
+    """Short blake2b digest identifying the given byte strings, used as a cache key."""
+    digest = hashlib.blake2b(digest_size=16)
+    for blob in blobs:
+        digest.update(hashlib.blake2b(blob, digest_size=16).digest())
+    return digest.hexdigest()
+
+def _is_near_grayscale(image: Image.Image) -> bool:
+    """Check whether an RGB image carries no meaningful colour, using a small sample."""
+    # Box-reduce straight to ~256px rather than copying the full raster first
+    sample = image.reduce(max(1, max(image.size) // 256))
+    red, green, blue = sample.split()
+    return all(
+        ImageChops.difference(a, b).getextrema()[1] < GRAYSCALE_TOLERANCE
+        for a, b in ((red, green), (green, blue))
+    )
+
+def _encode_png(image: Image.Image) -> bytes:
+    """
+    Encode an RGB image as PNG for the extractor.
     
+    Near-monochrome scans are stored as 8-bit grayscale (a third of the RGB
+    raster size), and fast zlib is used since the PNG is intermediate only.
+    """
+    if _is_near_grayscale(image):
+        image = image.convert('L')
+    with io.BytesIO() as img_bytes:
+        image.save(img_bytes, format='PNG', optimize=False, compress_level=1)
+        return img_bytes.getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=CONVERTED_FILE_CACHE_SIZE, ttl=3600)
+def _convert_bytes_to_png_pages(fingerprint: str, _file_bytes: bytes, file_extension: str, dpi: int,
+                                max_pages: int) -> list:
+    """
+    Convert raw upload bytes to PNG bytes, one entry per page.
+    
+    Cached on the content fingerprint (the raw bytes are excluded from
+    Streamlit's hashing) so reruns reuse the converted image instead of
+    rasterizing/re-encoding the same upload again.
+    """
+    file_bytes = _file_bytes
     try:
         if file_extension == 'pdf':
-            # Convert PDF to images (take first page)
-            images = convert_from_bytes(file_bytes, first_page=1, last_page=1, dpi=200)
-            if images:
-                # Convert PIL Image to PNG bytes
-                img_bytes = io.BytesIO()
-                images[0].save(img_bytes, format='PNG')
-                return img_bytes.getvalue()
-            else:
-                raise ValueError("No images found in PDF")
+            # Rasterize up to max_pages pages of the PDF, one at a time
+            png_pages = []
+            with _pdf_lib().open(stream=file_bytes, filetype="pdf") as doc:
+                if doc.page_count == 0:
+                    raise ValueError("No pages found in PDF")
+                for page in doc.pages(0, min(doc.page_count, max_pages)):
+                    pix = page.get_pixmap(dpi=dpi, alpha=False)
+                    image = Image.frombytes('RGB', (pix.width, pix.height), pix.samples)
+                    del pix
+                    png_pages.append(_encode_png(image))
+            return png_pages
         
         elif file_extension in ['jpg', 'jpeg']:
             # Convert JPG/JPEG to PNG
-            image = Image.open(io.BytesIO(file_bytes))
-            # Convert to RGB if needed (JPEG can be in different modes)
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            img_bytes = io.BytesIO()
-            image.save(img_bytes, format='PNG')
-            return img_bytes.getvalue()
+            with Image.open(io.BytesIO(file_bytes)) as source:
+                # Let the JPEG decoder downscale by DCT scaling so a large photo
+                # is never fully materialized at its original resolution
+                source.draft('RGB', MAX_IMAGE_SIZE)
+                # Convert to RGB if needed (JPEG can be in different modes)
+                image = source.convert('RGB') if source.mode != 'RGB' else source
+                # Downscale oversized photos; the extractor never needs more pixels
+                image.thumbnail(MAX_IMAGE_SIZE, Image.Resampling.LANCZOS)
+                png_bytes = _encode_png(image)
+                del image
+            return [png_bytes]
         
         elif file_extension == 'png':
             # Already PNG, return as-is
-            return file_bytes
+            return [file_bytes]
         
         else:
             raise ValueError(f"Unsupported file format: {file_extension}")
@@ -68,11 +222,52 @@ def convert_file_to_png_bytes(uploaded_file) -> bytes:
     except Exception as e:
         raise Exception(f"Error converting {file_extension.upper()} file: {str(e)}")
 
+def _json_default(obj):
+    """orjson fallback for values it cannot serialize natively."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
 # Initialize the transaction extractor
 @st.cache_resource
 def get_extractor():
     return TransactionExtractor()
 
+@st.cache_data(show_spinner=False, max_entries=16, ttl=3600)
+def _extract_transactions_cached(fingerprint: str, _page_images: list) -> list:
+    """Run AI extraction once per unique set of pages, keyed on their fingerprint."""
+    return get_extractor().extract_transactions_batch(_page_images)
+
+def extract_transactions_cached(page_images: list) -> list:
+    """
+    Extract transactions from statement pages, reusing earlier results for the same pages.
+    
+    An empty result (the extractor returns one when Gemini's response is empty
+    or unparseable) is dropped from the cache, so a transient model failure is
+    not replayed for the same upload.
+    """
+    fingerprint = content_fingerprint(*page_images)
+    transactions = _extract_transactions_cached(fingerprint, page_images)
+    if not transactions:
+        _extract_transactions_cached.clear(fingerprint, page_images)
+    return transactions
+
+def _load_sales_invoice(uploaded_file):
+    """
+    Parse one uploaded sales invoice JSON file.
+    
+    Returns:
+        Tuple of (file name, invoice data or None, error message or None)
+    """
+    try:
+        return uploaded_file.name, orjson.loads(uploaded_file.getvalue()), None
+    except Exception as e:
+        return uploaded_file.name, None, str(e)
+
+def load_sales_invoices(uploaded_files) -> list:
+    """Parse uploaded sales invoice JSON files in upload order."""
+    return [_load_sales_invoice(uploaded_file) for uploaded_file in uploaded_files]
+
 def main():
     st.title("🏛️ Tally ERP Automation Suite")
     st.markdown("Comprehensive automation solution for importing bank statements, invoices, and GST returns into Tally")
@@ -97,12 +292,7 @@ def main():
     with col_config2:
         company_state = st.selectbox(
             "Company State",
-            options=[
-                "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh", "Goa", "Gujarat", "Haryana",
-                "Himachal Pradesh", "Jharkhand", "Karnataka", "Kerala", "Madhya Pradesh", "Maharashtra", "Manipur",
-                "Meghalaya", "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan", "Sikkim", "Tamil Nadu",
-                "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal", "Delhi", "Puducherry"
-            ],
+            options=INDIAN_STATES,
             index=None,
             placeholder="Select your company's state",
             help="Required for accurate GST bifurcation (CGST+SGST vs IGST)"
@@ -156,39 +346,70 @@ def process_bank_statements(company_name: str):
     st.divider()
     
     # File uploader
-    uploaded_file = st.file_uploader(
-        "Choose a bank statement file",
+    uploaded_files = st.file_uploader(
+        "Choose bank statement files",
         type=['png', 'jpg', 'jpeg', 'pdf'],
-        accept_multiple_files=False,
-        help="Upload a clear image or PDF of your bank statement (PNG, JPG, JPEG, PDF formats supported)",
+        accept_multiple_files=True,
+        help=f"Upload clear images (one per page) or PDFs of your bank statement, up to {MAX_BANK_STATEMENT_PAGES} pages in total (PNG, JPG, JPEG, PDF formats supported)",
         key="bank_statement_uploader"
     )
     
-    if uploaded_file is not None:
-        # Convert file to PNG format for processing
+    if uploaded_files:
+        if len(uploaded_files) > MAX_BANK_STATEMENT_PAGES:
+            st.error(f"⚠️ Please upload at most {MAX_BANK_STATEMENT_PAGES} pages at a time")
+            return
+        
+        # Convert files to PNG format for processing, expanding PDFs page by page;
+        # one page past the cap is converted so an oversized statement is rejected
+        # rather than silently truncated
+        page_images = []
+        page_files = []
         try:
-            png_bytes = convert_file_to_png_bytes(uploaded_file)
-            original_format = uploaded_file.name.lower().split('.')[-1].upper()
+            for uploaded_file in uploaded_files:
+                pages = convert_file_to_png_pages(uploaded_file, dpi=BANK_STATEMENT_DPI, max_pages=MAX_BANK_STATEMENT_PAGES + 1)
+                page_images.extend(pages)
+                page_files.extend([uploaded_file] * len(pages))
+                if len(page_images) > MAX_BANK_STATEMENT_PAGES:
+                    break
         except Exception as e:
             st.error(f"Error processing file: {str(e)}")
             return
         
-        # Display uploaded file
+        if len(page_images) > MAX_BANK_STATEMENT_PAGES:
+            st.error(f"⚠️ Please upload at most {MAX_BANK_STATEMENT_PAGES} pages at a time")
+            return
+        
+        payload_bytes = sum(map(len, page_images))
+        if payload_bytes > MAX_EXTRACTION_PAYLOAD_BYTES:
+            st.error(
+                f"⚠️ The statement pages total {payload_bytes / 2**20:.1f} MB, above the "
+                f"{MAX_EXTRACTION_PAYLOAD_BYTES / 2**20:.0f} MB that can be sent for extraction at once. "
+                "Please upload fewer pages at a time."
+            )
+            return
+        
+        # Display uploaded files
         col1, col2 = st.columns([1, 1])
         
         with col1:
-            st.subheader(f"📄 Uploaded {original_format} File")
-            try:
-                # Display the converted PNG image
-                display_image = Image.open(io.BytesIO(png_bytes))
-                st.image(display_image, caption=f"Bank Statement ({original_format})", use_column_width=True)
-                
-                # File info
-                st.info(f"**File Details:**\n- Original Format: {original_format}\n- Size: {display_image.size[0]} x {display_image.size[1]} pixels\n- Processed Format: PNG\n- Mode: {display_image.mode}")
-                
-            except Exception as e:
-                st.error(f"Error displaying image: {str(e)}")
-                return
+            st.subheader(f"📄 Uploaded Files ({len(page_images)} page{'s' if len(page_images) > 1 else ''})")
+            for page_number, (uploaded_file, png_bytes) in enumerate(zip(page_files, page_images), start=1):
+                original_format = uploaded_file.name.lower().split('.')[-1].upper()
+                try:
+                    # Display the converted PNG image (decoded client-side)
+                    st.image(png_bytes, caption=f"Bank Statement page {page_number} ({original_format})", use_column_width=True)
+                    
+                    # Only the PNG header is parsed here; the raster is never loaded
+                    with Image.open(io.BytesIO(png_bytes)) as display_image:
+                        width, height = display_image.size
+                        mode = display_image.mode
+                    
+                    # File info
+                    st.info(f"**File Details:**\n- File: {uploaded_file.name}\n- Original Format: {original_format}\n- Size: {width} x {height} pixels\n- Processed Format: PNG\n- Mode: {mode}")
+                    
+                except Exception as e:
+                    st.error(f"Error displaying image: {str(e)}")
+                    return
         
         with col2:
             st.subheader("🔄 Transaction Extraction")
@@ -204,6 +425,12 @@ def process_bank_statements(company_name: str):
                         del st.session_state['extraction_completed']
                     if 'tally_xml' in st.session_state:
                         del st.session_state['tally_xml']
+                    st.session_state.pop('_xml_len', None)
+                    st.session_state.pop('_tx_df', None)
+                    st.session_state.pop('_transactions_json', None)
+                    st.session_state.pop('_transactions_csv', None)
+                    # Force a fresh AI pass for these pages rather than replaying the cached result
+                    _extract_transactions_cached.clear(content_fingerprint(*page_images), page_images)
                     st.rerun()
             else:
                 if st.button("Extract Transactions", type="primary"):
@@ -215,17 +442,15 @@ def process_bank_statements(company_name: str):
                         status_text.text("🔍 Analyzing image...")
                         progress_bar.progress(25)
                         
-                        # Get extractor
-                        extractor = get_extractor()
-                        
                         status_text.text("🤖 Processing with AI...")
                         progress_bar.progress(50)
                         
                         status_text.text("📊 Extracting transaction data...")
                         progress_bar.progress(75)
                         
-                        # Extract transactions using already converted PNG bytes
-                        transactions = extractor.extract_transactions(png_bytes)
+                        # Extract transactions from all pages in a single request;
+                        # identical pages are never sent to Gemini twice
+                        transactions = extract_transactions_cached(page_images)
                         
                         status_text.text("✅ Complete!")
                         progress_bar.progress(100)
@@ -234,6 +459,15 @@ def process_bank_statements(company_name: str):
                         st.session_state['extracted_transactions'] = transactions
                         st.session_state['extraction_completed'] = True
                         
+                        # Build/serialize once here rather than on every rerun of the result tabs
+                        df = pd.DataFrame.from_records(transactions, columns=BANK_TRANSACTION_COLUMNS)
+                        # The CSV keeps the extractor's amount strings, matching the JSON download
+                        st.session_state['_transactions_csv'] = df.to_csv(index=False)
+                        # Numeric amounts are for display only
+                        df[BANK_AMOUNT_COLUMNS] = df[BANK_AMOUNT_COLUMNS].apply(pd.to_numeric, errors='coerce')
+                        st.session_state['_tx_df'] = df
+                        st.session_state['_transactions_json'] = orjson.dumps(transactions, option=orjson.OPT_INDENT_2).decode()
+                        
                         # Clear progress indicators
                         progress_bar.empty()
                         status_text.empty()
@@ -255,170 +489,13 @@ def process_bank_statements(company_name: str):
                 st.divider()
                 st.subheader("📋 Extracted Transactions")
                 
-                # Create tabs for different views
-                tab1, tab2, tab3, tab4 = st.tabs(["📊 Table View", "📄 JSON View", "🔄 Tally XML", "💾 Download"])
-                
-                with tab1:
-                    # Display as dataframe
-                    import pandas as pd
-                    df = pd.DataFrame(transactions)
-                    st.dataframe(df, use_container_width=True)
-                            
-                    # Summary statistics
-                    if len(transactions) > 0:
-                        st.subheader("📈 Summary")
-                        col_a, col_b, col_c = st.columns(3)
-                        
-                        total_debits = sum(float(t.get('debit_amount', 0) or 0) for t in transactions)
-                        total_credits = sum(float(t.get('credit_amount', 0) or 0) for t in transactions)
-                        
-                        with col_a:
-                            st.metric("Total Transactions", len(transactions))
-                        with col_b:
-                            st.metric("Total Debits", f"₹{total_debits:,.2f}")
-                        with col_c:
-                            st.metric("Total Credits", f"₹{total_credits:,.2f}")
-                        
-                        with tab2:
-                            # Display as JSON
-                            json_str = json.dumps(transactions, indent=2)
-                            st.code(json_str, language="json")
-                        
-                        with tab3:
-                            # Tally XML Generation
-                            if company_name and bank_ledger_name:
-                                st.subheader("🔄 Generate Tally XML")
-                                
-                                try:
-                                    # Initialize XML generator
-                                    xml_generator = TallyXMLGenerator(company_name, bank_ledger_name)
-                                    
-                                    # Validate data before generation
-                                    validation_result = xml_generator.validate_xml_structure(transactions)
-                                    
-                                    # Show validation results
-                                    if validation_result['valid']:
-                                        st.success(f"✅ Ready to generate XML for {validation_result['transaction_count']} transactions")
-                                        
-                                        if validation_result['warnings']:
-                                            with st.expander("⚠️ Validation Warnings"):
-                                                for warning in validation_result['warnings']:
-                                                    st.warning(warning)
-                                        
-                                        # Generate XML button
-                                        if st.button("🔄 Generate Tally XML", type="primary"):
-                                            with st.spinner("Generating Tally XML..."):
-                                                xml_content = xml_generator.generate_xml(transactions)
-                                                
-                                                st.success("✅ Tally XML generated successfully!")
-                                                
-                                                # Display XML preview (first 2000 chars)
-                                                st.subheader("📄 XML Preview")
-                                                preview_xml = xml_content[:2000]
-                                                if len(xml_content) > 2000:
-                                                    preview_xml += "\n... (truncated, full XML available in download)"
-                                                
-                                                st.code(preview_xml, language="xml")
-                                                
-                                                # Store XML in session state for download
-                                                st.session_state['tally_xml'] = xml_content
-                                                
-                                                # Quick info about the XML
-                                                st.info(f"""
-                                                **XML Details:**
-                                                - Company: {company_name}
-                                                - Bank Ledger: {bank_ledger_name}
-                                                - Suspense Ledger: Suspense (auto-created if needed)
-                                                - Transactions: {len(transactions)}
-                                                - XML Size: {len(xml_content)} characters
-                                                """)
-                                    else:
-                                        st.error("❌ Validation failed. Please fix the following errors:")
-                                        for error in validation_result['errors']:
-                                            st.error(f"• {error}")
-                                        
-                                        if validation_result['warnings']:
-                                            st.warning("Additional warnings:")
-                                            for warning in validation_result['warnings']:
-                                                st.warning(f"• {warning}")
-                                                
-                                except Exception as e:
-                                    st.error(f"❌ Error generating XML: {str(e)}")
-                            else:
-                                st.warning("⚠️ Please configure company name and bank ledger name in the settings above to generate Tally XML")
-                        
-                        with tab4:
-                            # Download options
-                            st.subheader("💾 Download Options")
-                            
-                            col_dl1, col_dl2, col_dl3 = st.columns(3)
-                            
-                            with col_dl1:
-                                # JSON download
-                                json_str = json.dumps(transactions, indent=2)
-                                st.download_button(
-                                    label="📄 Download JSON",
-                                    data=json_str,
-                                    file_name="bank_transactions.json",
-                                    mime="application/json"
-                                )
-                            
-                            with col_dl2:
-                                # CSV download
-                                if transactions:
-                                    import pandas as pd
-                                    df = pd.DataFrame(transactions)
-                                    csv = df.to_csv(index=False)
-                                    st.download_button(
-                                        label="📊 Download CSV",
-                                        data=csv,
-                                        file_name="bank_transactions.csv",
-                                        mime="text/csv"
-                                    )
-                            
-                            with col_dl3:
-                                # Tally XML download
-                                if 'tally_xml' in st.session_state:
-                                    st.download_button(
-                                        label="🔄 Download Tally XML",
-                                        data=st.session_state['tally_xml'],
-                                        file_name="tally_import.xml",
-                                        mime="application/xml"
-                                    )
-                                else:
-                                    st.info("Generate XML first in Tally XML tab")
-                            
-                            # Instructions for XML import
-                            if 'tally_xml' in st.session_state:
-                                st.divider()
-                                with st.expander("📖 How to import XML into Tally"):
-                                    st.markdown("""
-                                    ### Steps to import into Tally:
-                                    
-                                    1. **Open Tally** and select your company
-                                    2. **Go to Gateway of Tally** → Import → XML Files
-                                    3. **Browse and select** the downloaded XML file
-                                    4. **Click Import** to process the transactions
-                                    5. **Verify** the imported transactions in your vouchers
-                                    
-                                    ### Important Notes:
-                                    - 🏢 Make sure the company name matches exactly
-                                    - 💰 All transactions will be posted to "Suspense" ledger
-                                    - ✅ The Suspense ledger will be created automatically if it doesn't exist
-                                    - 📝 You can later transfer amounts from Suspense to proper ledgers
-                                    - 🔄 Always backup your Tally data before importing
-                                    
-                                    ### After Import:
-                                    - Review transactions in Receipt/Payment vouchers
-                                    - Move amounts from Suspense to appropriate ledgers
-                                    - Verify running balance matches your bank statement
-                                    """)
+                _render_transaction_tabs(transactions, company_name, bank_ledger_name)
 
     # Instructions and tips for bank statements
     with st.expander("📖 How to use Bank Statement Processing"):
         st.markdown("""
         ### Instructions:
-        1. **Upload Image**: Select a PNG image of your bank statement
+        1. **Upload Pages**: Select one or more images/PDFs of your bank statement pages
         2. **Extract Data**: Click the "Extract Transactions" button
         3. **Review Results**: Check the extracted transaction data
         4. **Download**: Save the results as JSON or CSV
@@ -438,6 +515,171 @@ def process_bank_statements(company_name: str):
         - **Running Balance**: Account balance after transaction
         """)
 
+@st.fragment
+def _render_transaction_tabs(transactions: list, company_name: str, bank_ledger_name: str):
+    """
+    Render the result tabs for extracted bank transactions.
+    
+    Runs as a fragment so interactions inside the tabs rerun only this
+    section instead of the whole page.
+    """
+    # Create tabs for different views
+    tab1, tab2, tab3, tab4 = st.tabs(["📊 Table View", "📄 JSON View", "🔄 Tally XML", "💾 Download"])
+    
+    with tab1:
+        # Display as dataframe
+        df = st.session_state['_tx_df']
+        st.dataframe(df, use_container_width=True)
+                
+        # Summary statistics
+        if len(transactions) > 0:
+            st.subheader("📈 Summary")
+            col_a, col_b, col_c = st.columns(3)
+            
+            totals = df[['debit_amount', 'credit_amount']].fillna(0).sum()
+            total_debits = float(totals['debit_amount'])
+            total_credits = float(totals['credit_amount'])
+            
+            with col_a:
+                st.metric("Total Transactions", len(transactions))
+            with col_b:
+                st.metric("Total Debits", f"₹{total_debits:,.2f}")
+            with col_c:
+                st.metric("Total Credits", f"₹{total_credits:,.2f}")
+    
+    with tab2:
+        # Display as JSON
+        st.code(st.session_state['_transactions_json'], language="json")
+    
+    with tab3:
+        # Tally XML Generation
+        if company_name and bank_ledger_name:
+            st.subheader("🔄 Generate Tally XML")
+            
+            try:
+                # Initialize XML generator
+                xml_generator = TallyXMLGenerator(company_name, bank_ledger_name)
+                
+                # Validate data before generation
+                validation_result = xml_generator.validate_xml_structure(transactions)
+                
+                # Show validation results
+                if validation_result['valid']:
+                    st.success(f"✅ Ready to generate XML for {validation_result['transaction_count']} transactions")
+                    
+                    if validation_result['warnings']:
+                        with st.expander("⚠️ Validation Warnings"):
+                            for warning in validation_result['warnings']:
+                                st.warning(warning)
+                    
+                    # Generate XML button
+                    if st.button("🔄 Generate Tally XML", type="primary"):
+                        with st.spinner("Generating Tally XML..."):
+                            xml_content = xml_generator.generate_xml(transactions)
+                            
+                            st.success("✅ Tally XML generated successfully!")
+                            
+                            # Display XML preview (first 2000 chars)
+                            st.subheader("📄 XML Preview")
+                            preview_xml = xml_content[:2000]
+                            if len(xml_content) > 2000:
+                                preview_xml += "\n... (truncated, full XML available in download)"
+                            
+                            st.code(preview_xml, language="xml")
+                            
+                            # Store XML in session state for download, encoded once
+                            # so reruns hand the same bytes to the download button
+                            xml_bytes = xml_content.encode('utf-8')
+                            st.session_state['tally_xml'] = xml_bytes
+                            st.session_state['_xml_len'] = len(xml_bytes)
+                            
+                            # Quick info about the XML
+                            st.info(f"""
+                            **XML Details:**
+                            - Company: {company_name}
+                            - Bank Ledger: {bank_ledger_name}
+                            - Suspense Ledger: Suspense (auto-created if needed)
+                            - Transactions: {len(transactions)}
+                            - XML Size: {st.session_state['_xml_len']:,} bytes
+                            """)
+                else:
+                    st.error("❌ Validation failed. Please fix the following errors:")
+                    for error in validation_result['errors']:
+                        st.error(f"• {error}")
+                    
+                    if validation_result['warnings']:
+                        st.warning("Additional warnings:")
+                        for warning in validation_result['warnings']:
+                            st.warning(f"• {warning}")
+                            
+            except Exception as e:
+                st.error(f"❌ Error generating XML: {str(e)}")
+        else:
+            st.warning("⚠️ Please configure company name and bank ledger name in the settings above to generate Tally XML")
+    
+    with tab4:
+        # Download options
+        st.subheader("💾 Download Options")
+        
+        col_dl1, col_dl2, col_dl3 = st.columns(3)
+        
+        with col_dl1:
+            # JSON download
+            st.download_button(
+                label="📄 Download JSON",
+                data=st.session_state['_transactions_json'],
+                file_name="bank_transactions.json",
+                mime="application/json"
+            )
+        
+        with col_dl2:
+            # CSV download
+            if transactions:
+                st.download_button(
+                    label="📊 Download CSV",
+                    data=st.session_state['_transactions_csv'],
+                    file_name="bank_transactions.csv",
+                    mime="text/csv"
+                )
+        
+        with col_dl3:
+            # Tally XML download
+            if 'tally_xml' in st.session_state:
+                st.download_button(
+                    label="🔄 Download Tally XML",
+                    data=st.session_state['tally_xml'],
+                    file_name="tally_import.xml",
+                    mime="application/xml"
+                )
+            else:
+                st.info("Generate XML first in Tally XML tab")
+        
+        # Instructions for XML import
+        if 'tally_xml' in st.session_state:
+            st.divider()
+            with st.expander("📖 How to import XML into Tally"):
+                st.markdown("""
+                ### Steps to import into Tally:
+                
+                1. **Open Tally** and select your company
+                2. **Go to Gateway of Tally** → Import → XML Files
+                3. **Browse and select** the downloaded XML file
+                4. **Click Import** to process the transactions
+                5. **Verify** the imported transactions in your vouchers
+                
+                ### Important Notes:
+                - 🏢 Make sure the company name matches exactly
+                - 💰 All transactions will be posted to "Suspense" ledger
+                - ✅ The Suspense ledger will be created automatically if it doesn't exist
+                - 📝 You can later transfer amounts from Suspense to proper ledgers
+                - 🔄 Always backup your Tally data before importing
+                
+                ### After Import:
+                - Review transactions in Receipt/Payment vouchers
+                - Move amounts from Suspense to appropriate ledgers
+                - Verify running balance matches your bank statement
+                """)
+
 def process_invoices(company_name: str, company_state: str | None):
     """Handle invoice processing."""
     st.subheader("📄 Invoice Processing")
@@ -450,7 +692,7 @@ def process_invoices(company_name: str, company_state: str | None):
     # Invoice type selection
     invoice_type = st.selectbox(
         "Invoice Type",
-        options=["Purchase Invoice", "Sales Invoice"],
+        options=INVOICE_TYPES,
         help="Select whether this is a purchase or sales invoice"
     )
     
@@ -477,9 +719,10 @@ def process_invoices(company_name: str, company_state: str | None):
         with col1:
             st.subheader(f"📄 Uploaded {original_format} File")
             try:
-                display_image = Image.open(io.BytesIO(png_bytes))
-                st.image(display_image, caption=f"Invoice ({original_format})", use_column_width=True)
-                st.info(f"**File Details:**\n- Original Format: {original_format}\n- Size: {display_image.size[0]} x {display_image.size[1]} pixels")
+                st.image(png_bytes, caption=f"Invoice ({original_format})", use_column_width=True)
+                with Image.open(io.BytesIO(png_bytes)) as display_image:
+                    width, height = display_image.size
+                st.info(f"**File Details:**\n- Original Format: {original_format}\n- Size: {width} x {height} pixels")
             except Exception as e:
                 st.error(f"Error displaying image: {str(e)}")
                 return
@@ -584,7 +827,6 @@ def process_invoices(company_name: str, company_state: str | None):
                     # Display items
                     if invoice_data.get('items'):
                         st.subheader("📦 Line Items")
-                        import pandas as pd
                         items_df = pd.DataFrame(invoice_data['items'])
                         st.dataframe(items_df, use_container_width=True)
                 
@@ -652,7 +894,6 @@ def process_invoices(company_name: str, company_state: str | None):
                     with col_dl2:
                         # CSV download for items
                         if invoice_data.get('items'):
-                            import pandas as pd
                             df = pd.DataFrame(invoice_data['items'])
                             csv = df.to_csv(index=False)
                             st.download_button(
@@ -721,12 +962,7 @@ def process_gst_returns(company_name: str, company_state: str | None):
         st.warning("⚠️ GSTIN should be exactly 15 characters")
     
     # Create tabs for different GST processing options
-    tab_upload, tab_create_gstr1, tab_gstr2b_dedicated, tab_bulk_process = st.tabs([
-        "📥 Upload GST JSON to Tally", 
-        "📤 Create GSTR1 from Sales Invoices", 
-        "🏛️ GSTR2B Dedicated Processor",
-        "🔄 Bulk Process GST Data"
-    ])
+    tab_upload, tab_create_gstr1, tab_gstr2b_dedicated, tab_bulk_process = st.tabs(GST_TAB_LABELS)
     
     with tab_upload:
         st.subheader("📥 GST Portal JSON to Tally XML")
@@ -735,7 +971,7 @@ def process_gst_returns(company_name: str, company_state: str | None):
         # GST return type selection
         gst_return_type = st.selectbox(
             "GST Return Type",
-            options=["GSTR1 (Sales)", "GSTR2A (Purchase)", "GSTR2B (Purchase)", "GSTR3B (Monthly Return)"],
+            options=GST_RETURN_TYPES,
             help="Select the type of GST return you want to process"
         )
         
@@ -750,8 +986,8 @@ def process_gst_returns(company_name: str, company_state: str | None):
         if uploaded_gst_file is not None:
             try:
                 # Read and parse JSON
-                json_content = uploaded_gst_file.read().decode('utf-8')
-                gst_data = json.loads(json_content)
+                json_content = uploaded_gst_file.getvalue()
+                gst_data = orjson.loads(json_content)
                 
                 st.success(f"✅ {gst_return_type} JSON file loaded successfully!")
                 
@@ -759,7 +995,7 @@ def process_gst_returns(company_name: str, company_state: str | None):
                 st.info(f"""
                 **File Details:**
                 - File Name: {uploaded_gst_file.name}
-                - File Size: {len(json_content)} characters
+                - File Size: {len(json_content):,} bytes
                 - Return Type: {gst_return_type}
                 - GSTIN: {gst_data.get('gstin', 'Not found')}
                 - Period: {gst_data.get('ret_period', gst_data.get('fp', 'Not found'))}
@@ -813,7 +1049,7 @@ def process_gst_returns(company_name: str, company_state: str | None):
                         except Exception as e:
                             st.error(f"❌ Error generating XML: {str(e)}")
                 
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 st.error(f"❌ Invalid JSON file: {str(e)}")
             except Exception as e:
                 st.error(f"❌ Error processing file: {str(e)}")
@@ -859,16 +1095,17 @@ def process_gst_returns(company_name: str, company_state: str | None):
             )
             
             if uploaded_sales_files:
-                try:
-                    for file in uploaded_sales_files:
-                        json_content = file.read().decode('utf-8')
-                        invoice_data = json.loads(json_content)
-                        if invoice_data.get('invoice_type') == 'sales':
-                            sales_invoices.append(invoice_data)
-                    
-                    st.success(f"✅ Loaded {len(uploaded_sales_files)} sales invoice files")
-                except Exception as e:
-                    st.error(f"❌ Error loading sales invoice files: {str(e)}")
+                loaded_count = 0
+                for file_name, invoice_data, error in load_sales_invoices(uploaded_sales_files):
+                    if error:
+                        st.error(f"❌ Error loading sales invoice file {file_name}: {error}")
+                        continue
+                    loaded_count += 1
+                    if invoice_data.get('invoice_type') == 'sales':
+                        sales_invoices.append(invoice_data)
+                
+                if loaded_count:
+                    st.success(f"✅ Loaded {loaded_count} sales invoice files")
             
             if sales_invoices:
                 st.info(f"📋 Found {len(sales_invoices)} sales invoices for GSTR1 generation")
@@ -905,13 +1142,14 @@ def process_gst_returns(company_name: str, company_state: str | None):
                                 hsn_data = gstr1_data.get('hsn', {}).get('data', [])
                                 if hsn_data:
                                     st.subheader("📦 HSN Summary")
-                                    import pandas as pd
                                     hsn_df = pd.DataFrame(hsn_data)
                                     st.dataframe(hsn_df, use_container_width=True)
                                 
                                 # JSON preview
                                 st.subheader("📄 GSTR1 JSON Preview")
-                                json_str = json.dumps(gstr1_data, indent=2)
+                                # Serialize once; the bytes go straight to the download button
+                                payload = orjson.dumps(gstr1_data, default=_json_default, option=orjson.OPT_INDENT_2)
+                                json_str = payload.decode()
                                 preview_json = json_str[:2000]
                                 if len(json_str) > 2000:
                                     preview_json += "\n... (truncated, full JSON available in download)"
@@ -921,7 +1159,7 @@ def process_gst_returns(company_name: str, company_state: str | None):
                                 # Download button
                                 st.download_button(
                                     label="💾 Download GSTR1 JSON",
-                                    data=json_str,
+                                    data=payload,
                                     file_name=f"GSTR1_{company_gstin}_{return_month}{return_year}.json",
                                     mime="application/json"
                                 )
@@ -999,102 +1237,57 @@ def process_gst_returns(company_name: str, company_state: str | None):
     with st.expander("📤 Generate GSTR1 JSON for GST Portal Upload"):
         st.markdown("**Create GSTR1 JSON file for outward supplies to upload on GST portal**")
         
-        # Invoice entry form
-        st.subheader("Invoice Details Entry")
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            customer_gstin = st.text_input("Customer GSTIN", placeholder="01ABCDE1234F1Z5")
-            invoice_number = st.text_input("Invoice Number", placeholder="INV001")
-            invoice_date = st.date_input("Invoice Date")
+        # Resolve the company's state code once per state selection
+        if st.session_state.get('_company_state') != company_state:
+            st.session_state['_company_state'] = company_state
+            st.session_state['_company_state_code'] = GST_STATE_CODES.get(company_state, "27")
+        company_state_code = st.session_state['_company_state_code']
         
-        with col2:
-            place_of_supply = st.selectbox("Place of Supply", 
-                options=["01-Jammu and Kashmir", "02-Himachal Pradesh", "03-Punjab", "04-Chandigarh", 
-                        "05-Uttarakhand", "06-Haryana", "07-Delhi", "08-Rajasthan", "09-Uttar Pradesh",
-                        "10-Bihar", "11-Sikkim", "12-Arunachal Pradesh", "13-Nagaland", "14-Manipur",
-                        "15-Mizoram", "16-Tripura", "17-Meghalaya", "18-Assam", "19-West Bengal",
-                        "20-Jharkhand", "21-Odisha", "22-Chhattisgarh", "23-Madhya Pradesh",
-                        "24-Gujarat", "25-Daman and Diu", "26-Dadra and Nagar Haveli", "27-Maharashtra",
-                        "28-Andhra Pradesh", "29-Karnataka", "30-Goa", "31-Lakshadweep", "32-Kerala",
-                        "33-Tamil Nadu", "34-Puducherry", "35-Andaman and Nicobar Islands", "36-Telangana",
-                        "37-Andhra Pradesh"],
-                help="Select place of supply for the transaction")
+        # Invoice entry form (inputs only trigger a rerun on submit)
+        st.subheader("Invoice Details Entry")
+        with st.form("gstr1_entry"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                customer_gstin = st.text_input("Customer GSTIN", placeholder="01ABCDE1234F1Z5")
+                invoice_number = st.text_input("Invoice Number", placeholder="INV001")
+                invoice_date = st.date_input("Invoice Date")
+            
+            with col2:
+                place_of_supply = st.selectbox("Place of Supply", 
+                    options=PLACE_OF_SUPPLY_OPTIONS,
+                    help="Select place of supply for the transaction")
+                
+                tax_rate = st.selectbox("Tax Rate (%)", options=GST_TAX_RATES)
+                taxable_value = st.number_input("Taxable Value (₹)", min_value=0.0, format="%.2f")
             
-            tax_rate = st.selectbox("Tax Rate (%)", options=[0, 5, 12, 18, 28])
-            taxable_value = st.number_input("Taxable Value (₹)", min_value=0.0, format="%.2f")
+            submitted = st.form_submit_button("Add to GSTR1 JSON", type="primary")
         
-        if st.button("Add to GSTR1 JSON", type="primary"):
-            if customer_gstin and invoice_number and taxable_value > 0:
+        if submitted:
+            # Pasted GSTINs often carry stray whitespace or lowercase letters
+            customer_gstin = customer_gstin.strip().upper()
+            if customer_gstin and not GSTIN_PATTERN.match(customer_gstin):
+                st.error("⚠️ Invalid GSTIN format: expected 15 characters such as 27ABCDE1234F1Z5")
+            elif customer_gstin and invoice_number and taxable_value > 0:
                 # Create GSTR1 JSON structure
                 pos_code = place_of_supply.split('-')[0]
-                gst_processor = GSTProcessor(company_state)
-                company_state_code = next((code for state, code in gst_processor.state_codes.items() if state == company_state), "27")
-                
-                # Calculate tax amounts
-                is_interstate = pos_code != company_state_code
-                if is_interstate:
-                    igst_amount = (taxable_value * tax_rate) / 100
-                    cgst_amount = 0
-                    sgst_amount = 0
-                else:
-                    igst_amount = 0
-                    cgst_amount = (taxable_value * tax_rate) / 200  # Half of total tax
-                    sgst_amount = (taxable_value * tax_rate) / 200  # Half of total tax
-                
-                total_value = taxable_value + igst_amount + cgst_amount + sgst_amount
                 
-                gstr1_json = {
-                    "version": "GST1.1",
-                    "hash": "auto_generated_hash",
-                    "gstin": f"{company_state_code}ABCDE1234F1Z5",  # Placeholder GSTIN
-                    "fp": invoice_date.strftime("%m%Y"),
-                    "b2b": [
-                        {
-                            "ctin": customer_gstin,
-                            "inv": [
-                                {
-                                    "inum": invoice_number,
-                                    "idt": invoice_date.strftime("%d-%m-%Y"),
-                                    "val": round(total_value, 2),
-                                    "pos": pos_code,
-                                    "rchrg": "N",
-                                    "etin": "",
-                                    "inv_typ": "R",
-                                    "itms": [
-                                        {
-                                            "num": 1,
-                                            "itm_det": {
-                                                "rt": tax_rate,
-                                                "txval": round(taxable_value, 2),
-                                                "iamt": round(igst_amount, 2),
-                                                "camt": round(cgst_amount, 2),
-                                                "samt": round(sgst_amount, 2),
-                                                "csamt": 0
-                                            }
-                                        }
-                                    ]
-                                }
-                            ]
-                        }
-                    ],
-                    "b2cs": [],
-                    "hsn": [],
-                    "doc_issue": {}
-                }
+                return_period, gstr1_json = _build_gstr1(
+                    customer_gstin, invoice_number, invoice_date.isoformat(), pos_code,
+                    tax_rate, taxable_value, company_state_code
+                )
                 
                 st.success("✅ GSTR1 JSON created successfully!")
                 
-                # Display JSON preview
+                # Display JSON preview (rendered client-side from the JSON text)
                 st.subheader("📄 Generated JSON Preview")
-                st.code(json.dumps(gstr1_json, indent=2), language="json")
+                st.json(gstr1_json, expanded=False)
                 
                 # Download button
-                json_str = json.dumps(gstr1_json, indent=2)
                 st.download_button(
                     label="📥 Download GSTR1 JSON for GST Portal",
-                    data=json_str,
-                    file_name=f"GSTR1_{invoice_date.strftime('%m%Y')}_{invoice_number}.json",
+                    data=gstr1_json.encode(),
+                    file_name=f"GSTR1_{return_period}_{invoice_number}.json",
                     mime="application/json"
                 )
                 
@@ -1108,6 +1301,35 @@ def process_gst_returns(company_name: str, company_state: str | None):
                 """)
             else:
                 st.error("⚠️ Please fill all required fields with valid data")
+        
+        # Bulk entry from CSV
+        st.divider()
+        st.subheader("Bulk Invoice Entry")
+        st.markdown(f"Upload a CSV with one invoice per row and the columns: `{'`, `'.join(BULK_GSTR1_COLUMNS)}`")
+        bulk_file = st.file_uploader(
+            "Upload invoices CSV",
+            type=['csv'],
+            help="Place of supply may be a state code (07) or an option such as 07-Delhi; dates are DD-MM-YYYY",
+            key="gstr1_bulk_uploader"
+        )
+        
+        if bulk_file is not None:
+            try:
+                csv_bytes = bulk_file.getvalue()
+                bulk_result = _process_gstr1_bulk_csv(content_fingerprint(csv_bytes), csv_bytes, company_state_code)
+                if bulk_result['errors']:
+                    for error in bulk_result['errors']:
+                        st.error(f"❌ {error}")
+                else:
+                    st.success(f"✅ GSTR1 JSON created for {bulk_result['invoices']} invoices across {bulk_result['customers']} customers")
+                    st.download_button(
+                        label="📥 Download Bulk GSTR1 JSON for GST Portal",
+                        data=bulk_result['payload'],
+                        file_name=f"GSTR1_{bulk_result['fp']}_bulk.json",
+                        mime="application/json"
+                    )
+            except Exception as e:
+                st.error(f"❌ Error processing invoices CSV: {str(e)}")
     
     # Instructions
     with st.expander("📖 How to use GST Return Processing"):
@@ -1132,6 +1354,217 @@ def process_gst_returns(company_name: str, company_state: str | None):
         - **GSTR2A**: Purchase transactions (auto-matched)
         """)
 
+@st.cache_data(show_spinner=False, max_entries=256)
+def _build_gstr1(customer_gstin: str, invoice_number: str, invoice_date_iso: str, pos_code: str,
+                 tax_rate: int, taxable_value: float, company_state_code: str) -> tuple:
+    """
+    Build the GSTR1 JSON text for a single B2B invoice.
+    
+    The document has a fixed shape, so it is filled into _GSTR1_TEMPLATE
+    rather than assembled as nested dicts and serialized. A pure function
+    of its arguments, so repeated submissions of the same invoice are
+    served from the cache.
+    
+    Returns:
+        Tuple of (return period as MMYYYY, JSON text)
+    """
+    invoice_date = date.fromisoformat(invoice_date_iso)
+    
+    # Calculate tax amounts in integer paise: full rate as IGST for interstate
+    # supplies, otherwise split equally into CGST and SGST; each head is
+    # rounded half up to the paisa
+    is_interstate = pos_code != company_state_code
+    taxable_paise = round(taxable_value * 100)
+    tax_paise = taxable_paise * tax_rate
+    igst_paise = (tax_paise + 50) // 100 * is_interstate
+    cgst_paise = sgst_paise = (tax_paise + 100) // 200 * (not is_interstate)
+    
+    total_paise = taxable_paise + igst_paise + cgst_paise + sgst_paise
+    return_period = invoice_date.strftime("%m%Y")
+    
+    # Free-text fields are JSON-encoded so quotes and backslashes stay valid
+    return return_period, _GSTR1_TEMPLATE.format(
+        gstin=f"{company_state_code}ABCDE1234F1Z5",  # Placeholder GSTIN
+        fp=return_period,
+        ctin=orjson.dumps(customer_gstin).decode(),
+        inum=orjson.dumps(invoice_number).decode(),
+        idt=invoice_date.strftime("%d-%m-%Y"),
+        val=total_paise / 100,
+        pos=pos_code,
+        rt=tax_rate,
+        txval=taxable_paise / 100,
+        iamt=igst_paise / 100,
+        camt=cgst_paise / 100,
+        samt=sgst_paise / 100
+    )
+
+def _bulk_pos_codes(df: pd.DataFrame) -> pd.Series:
+    """Two-digit place-of-supply codes from a column of codes (07) or options (07-Delhi)."""
+    return df['place_of_supply'].fillna('').str.split('-').str[0].str.strip().str.zfill(2)
+
+def validate_gstr1_bulk(df: pd.DataFrame) -> list:
+    """
+    Check bulk GSTR1 invoices against the rules the single-invoice form enforces.
+    
+    Args:
+        df: One row per invoice with the BULK_GSTR1_COLUMNS columns, text
+            fields normalized by _read_gstr1_bulk_csv
+        
+    Returns:
+        Error messages naming the offending invoices; empty when all rows are valid
+    """
+    invoice_numbers = df['invoice_number'].fillna('')
+    # Invoices without a number are named by their CSV line instead
+    row_labels = pd.Series([f"row {line}" for line in range(2, len(df) + 2)], index=df.index)
+    invoice_labels = invoice_numbers.where(invoice_numbers != '', row_labels)
+    
+    taxable_values = pd.to_numeric(df['taxable_value'], errors='coerce')
+    tax_rates = pd.to_numeric(df['tax_rate'], errors='coerce')
+    invoice_dates = pd.to_datetime(df['invoice_date'], dayfirst=True, errors='coerce')
+    return_periods = invoice_dates.dt.strftime("%m%Y")
+    
+    checks = [
+        ("Missing invoice number", invoice_numbers == ''),
+        ("Invalid customer GSTIN", ~df['customer_gstin'].fillna('').str.match(GSTIN_PATTERN)),
+        ("Invalid invoice date", invoice_dates.isna()),
+        ("Invalid place of supply", ~_bulk_pos_codes(df).isin(GST_POS_CODES)),
+        (f"Tax rate not one of {', '.join(map(str, GST_TAX_RATES))}", ~tax_rates.isin(GST_TAX_RATES)),
+        ("Taxable value missing or not positive", ~(taxable_values > 0)),
+    ]
+    
+    # A GSTR1 file covers a single return period
+    if return_periods.nunique() > 1:
+        main_period = return_periods.mode()[0]
+        checks.append((
+            f"Invoice date outside return period {main_period}",
+            return_periods.notna() & (return_periods != main_period)
+        ))
+    
+    return [
+        f"{message} for invoices: {', '.join(invoice_labels[invalid])}"
+        for message, invalid in checks if invalid.any()
+    ]
+
+def build_gstr1_bulk(df: pd.DataFrame, company_state_code: str) -> dict:
+    """
+    Build GSTR1 JSON for many B2B invoices at once.
+    
+    Tax amounts for the whole batch are computed as NumPy array operations
+    rather than invoice by invoice; only the final JSON assembly iterates.
+    Rows must already have passed validate_gstr1_bulk.
+    
+    Args:
+        df: One row per invoice with the BULK_GSTR1_COLUMNS columns
+        company_state_code: Two-digit GST state code of the company
+        
+    Returns:
+        GSTR1 JSON with invoices grouped by customer GSTIN
+    """
+    pos_codes = _bulk_pos_codes(df).to_numpy()
+    rates = df['tax_rate'].to_numpy(dtype=np.int64)
+    taxable_values = df['taxable_value'].to_numpy(dtype=float)
+    invoice_dates = pd.to_datetime(df['invoice_date'], dayfirst=True)
+    
+    # Same integer-paise split and half-up rounding as _build_gstr1, over the
+    # whole batch
+    is_interstate = pos_codes != company_state_code
+    taxable_paise = np.rint(taxable_values * 100).astype(np.int64)
+    tax_paise = taxable_paise * rates
+    igst_paise = (tax_paise + 50) // 100 * is_interstate
+    cgst_paise = (tax_paise + 100) // 200 * ~is_interstate
+    total_paise = taxable_paise + igst_paise + 2 * cgst_paise
+    
+    b2b = {}
+    rows = zip(
+        df['customer_gstin'], df['invoice_number'], invoice_dates.dt.strftime("%d-%m-%Y"), pos_codes,
+        rates.tolist(), (total_paise / 100).tolist(), (taxable_paise / 100).tolist(),
+        (igst_paise / 100).tolist(), (cgst_paise / 100).tolist()
+    )
+    for ctin, inum, idt, pos, rt, val, txval, iamt, camt in rows:
+        b2b.setdefault(ctin, []).append({
+            "inum": inum,
+            "idt": idt,
+            "val": val,
+            "pos": pos,
+            "rchrg": "N",
+            "etin": "",
+            "inv_typ": "R",
+            "itms": [
+                {
+                    "num": 1,
+                    "itm_det": {
+                        "rt": rt,
+                        "txval": txval,
+                        "iamt": iamt,
+                        "camt": camt,
+                        "samt": camt,
+                        "csamt": 0
+                    }
+                }
+            ]
+        })
+    
+    # Same document shape as _GSTR1_TEMPLATE; keep the two in step
+    return {
+        "version": "GST1.1",
+        "hash": "auto_generated_hash",
+        "gstin": f"{company_state_code}ABCDE1234F1Z5",  # Placeholder GSTIN
+        "fp": invoice_dates.iloc[0].strftime("%m%Y"),  # validate_gstr1_bulk ensures a single period
+        "b2b": [{"ctin": ctin, "inv": invoices} for ctin, invoices in b2b.items()],
+        "b2cs": [],
+        "hsn": [],
+        "doc_issue": {}
+    }
+
+def _read_gstr1_bulk_csv(csv_bytes: bytes) -> pd.DataFrame:
+    """Read a bulk GSTR1 CSV, normalizing text fields once for validation and output alike."""
+    df = pd.read_csv(
+        io.BytesIO(csv_bytes),
+        dtype={'customer_gstin': str, 'invoice_number': str, 'place_of_supply': str}
+    )
+    if 'invoice_number' in df.columns:
+        df['invoice_number'] = df['invoice_number'].str.strip()
+    if 'customer_gstin' in df.columns:
+        df['customer_gstin'] = df['customer_gstin'].str.strip().str.upper()
+    return df
+
+@st.cache_data(show_spinner=False, max_entries=8, ttl=3600)
+def _process_gstr1_bulk_csv(fingerprint: str, _csv_bytes: bytes, company_state_code: str) -> dict:
+    """
+    Read, validate, build and serialize a bulk GSTR1 CSV upload.
+    
+    Cached on the CSV fingerprint and company state code, so reruns
+    triggered by other widgets reuse the finished file instead of redoing
+    the whole pipeline.
+    
+    Returns:
+        Dict with 'errors' (messages to show); when empty, also 'payload'
+        (JSON bytes), 'fp', 'invoices' and 'customers'
+    """
+    df = _read_gstr1_bulk_csv(_csv_bytes)
+    missing_columns = [column for column in BULK_GSTR1_COLUMNS if column not in df.columns]
+    if missing_columns:
+        return {'errors': [f"Missing columns in CSV: {', '.join(missing_columns)}"]}
+    if df.empty:
+        return {'errors': ["The CSV file contains no invoices"]}
+    
+    validation_errors = validate_gstr1_bulk(df)
+    if validation_errors:
+        return {'errors': validation_errors}
+    
+    bulk_json = build_gstr1_bulk(df, company_state_code)
+    return {
+        'errors': [],
+        'payload': orjson.dumps(bulk_json, default=_json_default, option=orjson.OPT_INDENT_2),
+        'fp': bulk_json['fp'],
+        'invoices': len(df),
+        'customers': len(bulk_json['b2b'])
+    }
+
+def _currency_formats(columns: list) -> dict:
+    """Styler format spec rendering the given numeric columns as rupee amounts."""
+    return {column: '₹{:,.2f}' for column in columns}
+
 def process_gstr2b_dedicated(company_name: str, company_state: str | None, company_gstin: str | None):
     """Handle dedicated GSTR2B processing with separate Masters and Transactions XML generation."""
     st.subheader("🏛️ GSTR2B Dedicated Processor")
@@ -1157,8 +1590,8 @@ def process_gstr2b_dedicated(company_name: str, company_state: str | None, compa
     if uploaded_gstr2b_file is not None:
         try:
             # Read and parse JSON
-            json_content = uploaded_gstr2b_file.read().decode('utf-8')
-            gstr2b_data = json.loads(json_content)
+            json_content = uploaded_gstr2b_file.getvalue()
+            gstr2b_data = orjson.loads(json_content)
             
             st.success(f"✅ GSTR2B JSON file loaded successfully!")
             
@@ -1168,7 +1601,7 @@ def process_gstr2b_dedicated(company_name: str, company_state: str | None, compa
                 st.info(f"""
                 **File Details:**
                 - File Name: {uploaded_gstr2b_file.name}
-                - File Size: {len(json_content):,} characters
+                - File Size: {len(json_content):,} bytes
                 - Data Structure: Official GST Portal Format
                 """)
             
@@ -1217,7 +1650,7 @@ def process_gstr2b_dedicated(company_name: str, company_state: str | None, compa
                 for error in validation_result['errors']:
                     st.error(f"• {error}")
                 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             st.error(f"❌ Invalid JSON file: {str(e)}")
         except Exception as e:
             st.error(f"❌ Error processing GSTR2B file: {str(e)}")
@@ -1250,41 +1683,40 @@ def process_gstr2b_dedicated(company_name: str, company_state: str | None, compa
         
         with tab_vendors:
             st.subheader("👥 Vendor Summary")
-            vendor_data = []
-            for vendor in vendors:
-                vendor_data.append({
-                    'GSTIN': vendor.ctin,
-                    'Vendor Name': vendor.trdnm,
-                    'Invoices': vendor.total_invoices,
-                    'Taxable Value': f"₹{vendor.total_taxable_value:,.2f}",
-                    'CGST': f"₹{vendor.total_cgst:,.2f}",
-                    'SGST': f"₹{vendor.total_sgst:,.2f}",
-                    'IGST': f"₹{vendor.total_igst:,.2f}",
-                    'Total Tax': f"₹{vendor.total_cgst + vendor.total_sgst + vendor.total_igst:,.2f}"
+            if vendors:
+                df_vendors = pd.DataFrame({
+                    'GSTIN': [v.ctin for v in vendors],
+                    'Vendor Name': [v.trdnm for v in vendors],
+                    'Invoices': [v.total_invoices for v in vendors],
+                    'Taxable Value': [v.total_taxable_value for v in vendors],
+                    'CGST': [v.total_cgst for v in vendors],
+                    'SGST': [v.total_sgst for v in vendors],
+                    'IGST': [v.total_igst for v in vendors]
                 })
-            
-            import pandas as pd
-            if vendor_data:
-                df_vendors = pd.DataFrame(vendor_data)
-                st.dataframe(df_vendors, use_container_width=True)
+                df_vendors['Total Tax'] = df_vendors['CGST'] + df_vendors['SGST'] + df_vendors['IGST']
+                st.dataframe(
+                    df_vendors.style.format(_currency_formats(['Taxable Value', 'CGST', 'SGST', 'IGST', 'Total Tax'])),
+                    use_container_width=True
+                )
         
         with tab_invoices:
             st.subheader("📄 Invoice Details")
-            invoice_data = []
-            for invoice in invoices[:100]:  # Show first 100 invoices
-                invoice_data.append({
-                    'Vendor': invoice.vendor_name[:30] + '...' if len(invoice.vendor_name) > 30 else invoice.vendor_name,
-                    'Invoice No': invoice.invoice_number,
-                    'Date': invoice.invoice_date,
-                    'Value': f"₹{invoice.invoice_value:,.2f}",
-                    'CGST': f"₹{invoice.cgst_amount:,.2f}",
-                    'SGST': f"₹{invoice.sgst_amount:,.2f}",
-                    'IGST': f"₹{invoice.igst_amount:,.2f}"
-                })
+            shown_invoices = invoices[:100]  # Show first 100 invoices
             
-            if invoice_data:
-                df_invoices = pd.DataFrame(invoice_data)
-                st.dataframe(df_invoices, use_container_width=True)
+            if shown_invoices:
+                df_invoices = pd.DataFrame({
+                    'Vendor': [i.vendor_name[:30] + '...' if len(i.vendor_name) > 30 else i.vendor_name for i in shown_invoices],
+                    'Invoice No': [i.invoice_number for i in shown_invoices],
+                    'Date': [i.invoice_date for i in shown_invoices],
+                    'Value': [i.invoice_value for i in shown_invoices],
+                    'CGST': [i.cgst_amount for i in shown_invoices],
+                    'SGST': [i.sgst_amount for i in shown_invoices],
+                    'IGST': [i.igst_amount for i in shown_invoices]
+                })
+                st.dataframe(
+                    df_invoices.style.format(_currency_formats(['Value', 'CGST', 'SGST', 'IGST'])),
+                    use_container_width=True
+                )
                 if len(invoices) > 100:
                     st.info(f"Showing first 100 invoices out of {len(invoices)} total")
         
@@ -8,7 +8,7 @@ from dataclasses import dataclass
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class GSTTransaction:
     """Represents a GST transaction from return data."""
     date: str
@@ -6,7 +6,10 @@ from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Fields the 'data' section of a GSTR2B JSON must contain
+REQUIRED_GSTR2B_FIELDS = ('gstin', 'rtnprd', 'docdata')
+
+@dataclass(slots=True)
 class GSTR2BVendor:
     """Represents a vendor from GSTR2B data."""
     ctin: str
@@ -19,7 +22,7 @@ class GSTR2BVendor:
     total_cess: float
     invoices: List[Dict[str, Any]]
 
-@dataclass 
+@dataclass(slots=True)
 class GSTR2BInvoice:
     """Represents an invoice from GSTR2B data."""
     vendor_ctin: str
@@ -201,25 +204,21 @@ class GSTR2BDedicatedProcessor:
         data = gstr2b_json['data']
         
         # Check required fields
-        required_fields = ['gstin', 'rtnprd', 'docdata']
-        for field in required_fields:
-            if field not in data:
-                validation_result['valid'] = False
-                validation_result['errors'].append(f"Missing required field: {field}")
+        missing_fields = [field for field in REQUIRED_GSTR2B_FIELDS if field not in data]
+        if missing_fields:
+            validation_result['valid'] = False
+            validation_result['errors'].extend(f"Missing required field: {field}" for field in missing_fields)
         
         # Check docdata structure
+        b2b_data = data.get('docdata', {}).get('b2b')
         if 'docdata' in data:
-            docdata = data['docdata']
-            if 'b2b' not in docdata:
+            if b2b_data is None:
                 validation_result['warnings'].append("No B2B data found in docdata")
-            elif not docdata['b2b']:
+            elif not b2b_data:
                 validation_result['warnings'].append("Empty B2B data found")
         
         # Check for invoices
-        total_invoices = 0
-        if 'docdata' in data and 'b2b' in data['docdata']:
-            for vendor in data['docdata']['b2b']:
-                total_invoices += len(vendor.get('inv', []))
+        total_invoices = sum(len(vendor.get('inv', [])) for vendor in b2b_data or [])
         
         if total_invoices == 0:
             validation_result['warnings'].append("No invoices found in GSTR2B data")
@@ -2,6 +2,7 @@ import xml.etree.ElementTree as ET
 from typing import List, Dict, Any
 from datetime import datetime
 import logging
+from collections import Counter
 from gstr2b_dedicated_processor import GSTR2BVendor
 
 logger = logging.getLogger(__name__)
@@ -247,20 +248,21 @@ class GSTR2BMastersXMLGenerator:
             return validation_result
         
         # Check for duplicate vendor names
-        vendor_names = [self._clean_ledger_name(v.trdnm or f"Vendor-{v.ctin}") for v in vendors]
-        duplicates = set([name for name in vendor_names if vendor_names.count(name) > 1])
+        name_counts = Counter(self._clean_ledger_name(v.trdnm or f"Vendor-{v.ctin}") for v in vendors)
+        duplicates = [name for name, count in name_counts.items() if count > 1]
         
         if duplicates:
-            validation_result['warnings'].append(f"Duplicate vendor names found: {list(duplicates)}")
+            validation_result['warnings'].append(f"Duplicate vendor names found: {duplicates}")
         
         # Check for vendors without GSTIN
-        vendors_without_gstin = [v for v in vendors if not v.ctin]
+        vendors_with_gstin = sum(1 for v in vendors if v.ctin)
+        vendors_without_gstin = len(vendors) - vendors_with_gstin
         if vendors_without_gstin:
-            validation_result['warnings'].append(f"{len(vendors_without_gstin)} vendors without GSTIN found")
+            validation_result['warnings'].append(f"{vendors_without_gstin} vendors without GSTIN found")
         
         validation_result['summary'] = {
             'total_vendors': len(vendors),
-            'vendors_with_gstin': len([v for v in vendors if v.ctin]),
+            'vendors_with_gstin': vendors_with_gstin,
             'total_invoices': sum(v.total_invoices for v in vendors)
         }
         
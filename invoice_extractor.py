@@ -216,11 +216,15 @@ Important:
     def _optimize_image(self, image_bytes: bytes) -> bytes:
         """Optimize image for processing."""
         try:
-            # Open image
+            # Open image (only the header is read at this point)
             image = Image.open(io.BytesIO(image_bytes))
             
-            # Convert to RGB if needed
-            if image.mode != 'RGB':
+            # PNGs the app has already converted and sized are sent unchanged
+            if image.format == 'PNG' and image.mode in ('RGB', 'L') and max(image.size) <= 2048:
+                return image_bytes
+            
+            # Convert to RGB if needed (grayscale scans are kept as-is)
+            if image.mode not in ('RGB', 'L'):
                 image = image.convert('RGB')
             
             # Resize if too large (max 2048x2048)
@@ -230,9 +234,9 @@ Important:
                 new_size = (int(image.size[0] * ratio), int(image.size[1] * ratio))
                 image = image.resize(new_size, Image.Resampling.LANCZOS)
             
-            # Save as PNG with optimization
+            # Save as PNG with fast compression
             output = io.BytesIO()
-            image.save(output, format='PNG', optimize=True)
+            image.save(output, format='PNG', optimize=False, compress_level=1)
             return output.getvalue()
             
         except Exception as e:
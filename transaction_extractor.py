@@ -39,6 +39,18 @@ class TransactionExtractor:
         Returns:
             List of transaction dictionaries
         """
+        return self.extract_transactions_batch([image_bytes])
+
+    def extract_transactions_batch(self, images: List[bytes]) -> List[Dict[str, Any]]:
+        """
+        Extract transaction data from several bank statement pages in one request.
+        
+        Args:
+            images: PNG image data for each page, in page order
+            
+        Returns:
+            List of transaction dictionaries across all pages
+        """
         try:
             # Streamlined prompt for faster processing
             prompt = """Extract all transactions from this bank statement as JSON array.
@@ -52,19 +64,22 @@ Required fields per transaction:
 
 Return only valid JSON array. Include all visible transactions in chronological order , and make sure to follow the accounting convention , if something is withrawal in the bank so it should be credit and if it is deposit then it must be debit"""
 
-            # Optimize image before processing
-            optimized_image_bytes = self._optimize_image(image_bytes)
+            if len(images) > 1:
+                prompt += "\n\nThe images are consecutive pages of the same statement, in page order."
+
+            # Optimize each page before processing
+            image_parts = [
+                types.Part.from_bytes(
+                    data=self._optimize_image(image_bytes),
+                    mime_type="image/png",
+                )
+                for image_bytes in images
+            ]
             
             # Generate content with image analysis using faster model
             response = self.client.models.generate_content(
                 model="gemini-2.5-flash",
-                contents=[
-                    types.Part.from_bytes(
-                        data=optimized_image_bytes,
-                        mime_type="image/png",
-                    ),
-                    prompt
-                ],
+                contents=[*image_parts, prompt],
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json",
                 ),
@@ -221,11 +236,15 @@ Return only valid JSON array. Include all visible transactions in chronological
             Optimized image bytes
         """
         try:
-            # Open the image
+            # Open the image (only the header is read at this point)
             image = Image.open(io.BytesIO(image_bytes))
             
-            # Convert to RGB if needed (for consistent processing)
-            if image.mode != 'RGB':
+            # PNGs the app has already converted and sized are sent unchanged
+            if image.format == 'PNG' and image.mode in ('RGB', 'L') and max(image.size) <= 2048:
+                return image_bytes
+            
+            # Convert to RGB if needed (grayscale scans are kept as-is)
+            if image.mode not in ('RGB', 'L'):
                 image = image.convert('RGB')
             
             # Get original dimensions
@@ -247,7 +266,7 @@ Return only valid JSON array. Include all visible transactions in chronological
             
             # Save optimized image to bytes
             output_bytes = io.BytesIO()
-            image.save(output_bytes, format='PNG', optimize=True)
+            image.save(output_bytes, format='PNG', optimize=False, compress_level=1)
             return output_bytes.getvalue()
             
         except Exception as e: